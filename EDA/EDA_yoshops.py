@@ -1,5 +1,7 @@
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
+import matplotlib.ticker as ticker
 import openpyxl
 import calendar
 import os
@@ -8,6 +10,10 @@ import logging
 
 logging.basicConfig(filename='analysis.log', level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Parts of a day, indexed by hour; the extra trailing slot maps missing timestamps to NaN
+DAY_PARTS = ['Night', 'Morning', 'Afternoon', 'Evening']
+DAY_PART_BY_HOUR = np.array([0] * 6 + [1] * 6 + [2] * 6 + [3] * 6 + [-1])
+
 def load_datasets():
     try:
         df = pd.read_csv('review_dataset.csv')
@@ -18,6 +24,34 @@ def load_datasets():
         logging.error(f"Error loading datasets: {str(e)}")
         raise
 
+def to_number(series):
+    # Strip the rupee sign, thousands separators and spaces from price strings
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    return pd.to_numeric(series.astype(str).str.replace(r'[₹,\s]', '', regex=True), errors='coerce')
+
+def add_time_buckets(df2, column='Order Date and Time Stamp'):
+    # Vectorized replacement for per-row hour categorization: derive every bucket from one
+    # datetime64 array with integer arithmetic, then map hours to day parts with a lookup
+    timestamps = df2[column]
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_localize(None)
+    values = timestamps.to_numpy(dtype='datetime64[ns]')
+    missing = np.isnat(values)
+    days = values.astype('datetime64[D]')
+    months = values.astype('datetime64[M]')
+    years = values.astype('datetime64[Y]')
+    hours = np.where(missing, 24, (values - days).astype('timedelta64[h]').astype(int))
+
+    valid = pd.Series(~missing, index=df2.index)
+    df2['Year'] = pd.Series(years.astype(int) + 1970, index=df2.index).where(valid).astype('Int64')
+    df2['Month'] = pd.Series((months - years).astype(int) + 1, index=df2.index).where(valid).astype('Int64')
+    # 1970-01-01 was a Thursday, so shift to make Monday 0 as in dt.dayofweek
+    df2['Weekday'] = pd.Series((days.astype(int) + 3) % 7, index=df2.index).where(valid).astype('Int64')
+    df2['Hour'] = pd.Series(hours, index=df2.index).where(valid).astype('Int64')
+    df2['Day Part'] = pd.Categorical.from_codes(DAY_PART_BY_HOUR[hours], categories=DAY_PARTS, ordered=True)
+    return df2
+
 def clean_datasets(df, df2):
     try:
         # Cleaning review dataset
@@ -32,9 +66,8 @@ def clean_datasets(df, df2):
                     df2.at[index, 'Shipping State'] = matching_row.iloc[0]['Shipping State']
 
         df2['Order Date and Time Stamp'] = pd.to_datetime(df2['Order Date and Time Stamp'], format='%d-%m-%Y %H:%M:%S %z')
-        df2['Total'] = df2['Total'].str.replace('₹', '').str.replace(',', '')
-        df2['Month'] = df2['Order Date and Time Stamp'].dt.month
-        df2['Year'] = df2['Order Date and Time Stamp'].dt.year
+        df2['Total'] = to_number(df2['Total'])
+        add_time_buckets(df2)
 
         logging.info("Datasets cleaned successfully.")
     except Exception as e:
@@ -329,17 +362,18 @@ def plot_category_ratings(df):
 
 def plot_orders_and_revenue_per_month(df2):
     try:
-        df2['Order Date and Time Stamp'] = pd.to_datetime(df2['Order Date and Time Stamp'])
-        df2['Year'] = df2['Order Date and Time Stamp'].dt.year
+        # clean_datasets already adds the time buckets; only derive them for raw frames
+        if 'Day Part' not in df2.columns:
+            add_time_buckets(df2)
 
-        orders_per_month_per_year = df2.groupby(['Year', df2['Order Date and Time Stamp'].dt.month])['Order Date and Time Stamp'].count()
-        revenue_per_month_per_year = df2.groupby(['Year', df2['Order Date and Time Stamp'].dt.month])['Total'].sum()
+        monthly = df2.groupby(['Year', 'Month']).agg(Orders=('Order Date and Time Stamp', 'count'), Revenue=('Total', 'sum'))
 
-        for year in df2['Year'].unique():
+        for year in monthly.index.get_level_values('Year').unique():
             plt.figure(figsize=(10, 6))
-            
-            orders_data = orders_per_month_per_year.loc[year]
-            revenue_data = revenue_per_month_per_year.loc[year]
+
+            year_data = monthly.loc[year].reindex(range(1, 13), fill_value=0)
+            orders_data = year_data['Orders']
+            revenue_data = year_data['Revenue']
 
             plt.subplot(2, 1, 1)
             orders_data.plot(kind='bar', color='blue', alpha=0.7)
@@ -361,7 +395,7 @@ def plot_orders_and_revenue_per_month(df2):
             plt.close()
 
             # Save data to Excel file
-            wb = Workbook()
+            wb = openpyxl.Workbook()
             ws = wb.active
             ws['A1'] = 'Month'
             ws['B1'] = 'Number of Orders'
@@ -423,28 +457,15 @@ def plot_orders_and_reviews_per_month_and_year(df, df2):
 
 def plot_orders_by_year_day_part(df2):
     try:
-        years = df2['Year'].unique()
-        df2['Hour'] = df2['Order Date and Time Stamp'].dt.hour
-
-        # Define a function to categorize the hour into parts of a day
-        def categorize_hour(hour):
-            if 0 <= hour < 6:
-                return 'Night'
-            elif 6 <= hour < 12:
-                return 'Morning'
-            elif 12 <= hour < 18:
-                return 'Afternoon'
-            else:
-                return 'Evening'
-
-        # Apply the function to categorize the hour
-        df2['Day Part'] = df2['Hour'].apply(categorize_hour)
+        if 'Day Part' not in df2.columns:
+            add_time_buckets(df2)
 
-        # Group by the parts of the day and count the number of orders
-        orders_by_day_part = df2.groupby('Day Part')['Order #'].count()
+        # Single grouped pass; yearly totals are rolled up from the monthly counts
+        orders_by_month_day_part = df2.groupby(['Year', 'Month', 'Day Part'], observed=False)['Order #'].count().unstack('Day Part')
+        orders_by_year_day_part = orders_by_month_day_part.groupby(level='Year').sum()
 
         with pd.ExcelWriter('Orders_By_Year_Day_Part.xlsx', engine='openpyxl') as writer:
-            for year in years:
+            for year, orders_by_day_part in orders_by_year_day_part.iterrows():
                 plt.figure(figsize=(8, 5))
                 orders_by_day_part.plot(kind='bar', color='blue', alpha=0.7)
                 plt.xlabel('Part of Day')
@@ -459,7 +480,9 @@ def plot_orders_by_year_day_part(df2):
                 plt.close()
 
                 # Save data to Excel
-                orders_by_day_part.to_excel(writer, sheet_name=f'Orders_{year}')
+                orders_by_day_part.rename('Order #').to_excel(writer, sheet_name=f'Orders_{year}')
+
+            orders_by_month_day_part.to_excel(writer, sheet_name='Orders_By_Month')
 
         print("Data and graphs saved successfully!")
 
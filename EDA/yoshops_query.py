@@ -0,0 +1,266 @@
+import os
+import glob
+import sqlite3
+import logging
+from collections import OrderedDict
+
+import pandas as pd
+
+import EDA_yoshops
+from EDA_yoshops import load_datasets, clean_datasets, to_number
+
+DB_FILENAME = 'yoshops_query.db'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Order timestamps are stored as wall-clock time in this zone, without the offset
+ORDER_TIMEZONE = 'Asia/Kolkata'
+
+# Tables every usable database must contain
+REQUIRED_TABLES = {'reviews', 'orders'}
+
+# Column used for start/end time-range filters on each table
+DATE_COLUMNS = {'orders': 'Order Date'}
+
+# Common dimensions that get an index so filters and group-bys stay fast
+INDEXED_COLUMNS = {
+    'orders': ['Order Date', 'Shipping State', 'Shipping City', 'LineItem SKU', 'LineItem Name', 'Year', 'Month'],
+    'reviews': ['category', 'product_name'],
+    'products': ['category', 'title'],
+}
+
+AGGREGATES = {'count', 'sum', 'avg', 'min', 'max'}
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _to_order_time(value):
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert(ORDER_TIMEZONE).tz_localize(None)
+    return timestamp.strftime(DATE_FORMAT)
+
+
+def prepare_orders(df2):
+    orders = df2.copy()
+    timestamps = pd.to_datetime(orders['Order Date and Time Stamp'])
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_convert(ORDER_TIMEZONE)
+    orders['Order Date'] = timestamps.dt.strftime(DATE_FORMAT)
+    orders['Total'] = to_number(orders['Total'])
+    return orders.drop(columns=['Order Date and Time Stamp'])
+
+
+def prepare_reviews(df):
+    reviews = df.copy()
+    reviews['stars_numeric'] = reviews['stars'].astype(str).str.extract(r'(\d+\.?\d*)', expand=False).astype(float)
+    return reviews
+
+
+def load_scraped_products(pattern):
+    # Each scraper run writes <category>.xlsx, so the file name is the category
+    frames = []
+    for path in sorted(glob.glob(pattern)):
+        products = pd.read_excel(path)
+        products['category'] = os.path.splitext(os.path.basename(path))[0]
+        frames.append(products)
+    if not frames:
+        return None
+    products = pd.concat(frames, ignore_index=True)
+    products['original_price'] = to_number(products['original_price'])
+    products['discounted_price'] = to_number(products['discounted_price'])
+    return products
+
+
+class YoshopsQuery:
+    def __init__(self, db_path=DB_FILENAME, cache_size=128):
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._columns = {}
+        self.conn = sqlite3.connect(db_path)
+        self._load_schema()
+
+    def _load_schema(self):
+        self._columns = {}
+        tables = self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        for (table,) in tables:
+            info = self.conn.execute(f'PRAGMA table_info({_quote(table)})').fetchall()
+            self._columns[table] = {row[1] for row in info}
+
+    def build(self, reviews=None, orders=None, products=None):
+        """Write the cleaned datasets to SQLite and index the common dimensions."""
+        try:
+            for table, frame in (('reviews', reviews), ('orders', orders), ('products', products)):
+                if frame is None:
+                    continue
+                frame.to_sql(table, self.conn, if_exists='replace', index=False)
+                for column in INDEXED_COLUMNS[table]:
+                    if column in frame.columns:
+                        index_name = f'idx_{table}_' + column.lower().replace(' ', '_')
+                        self.conn.execute(f'CREATE INDEX {_quote(index_name)} ON {_quote(table)} ({_quote(column)})')
+            self.conn.commit()
+            self._load_schema()
+            self._cache.clear()
+            logging.info("Query database built successfully.")
+        except Exception as e:
+            logging.error(f"Error building query database: {str(e)}")
+            raise
+
+    def tables(self):
+        return sorted(self._columns)
+
+    def _check_column(self, table, column):
+        if column not in self._columns[table]:
+            raise ValueError(f"Unknown column {column!r} for table {table!r}")
+
+    def query(self, table, filters=None, group_by=None, aggregates=None, start=None, end=None,
+              order_by=None, ascending=False, limit=None):
+        """Run a filtered, optionally grouped query and return a DataFrame.
+
+        filters maps a column to a value, or to a list of values for an IN match;
+        None matches missing values.
+        aggregates maps an output name to a (function, column) pair, e.g.
+        {'Revenue': ('sum', 'Total')}; use '*' as the column for count.
+        start and end bound the table's date column (end is exclusive). Timezone-aware
+        bounds are converted to ORDER_TIMEZONE; naive ones are taken as order wall time.
+        """
+        if table not in self._columns:
+            raise ValueError(f"Unknown table {table!r}")
+        group_by = [group_by] if isinstance(group_by, str) else list(group_by or [])
+        aggregates = aggregates or {}
+
+        select = []
+        for column in group_by:
+            self._check_column(table, column)
+            select.append(_quote(column))
+        for name, (func, column) in aggregates.items():
+            if func not in AGGREGATES:
+                raise ValueError(f"Unsupported aggregate {func!r}")
+            if column == '*' and func != 'count':
+                raise ValueError(f"Aggregate {func!r} needs a column; '*' is only valid for count")
+            if column != '*':
+                self._check_column(table, column)
+                column = _quote(column)
+            select.append(f'{func.upper()}({column}) AS {_quote(name)}')
+        if not select:
+            select = ['*']
+
+        where, params = [], []
+        for column, value in (filters or {}).items():
+            self._check_column(table, column)
+            if isinstance(value, (list, tuple, set)):
+                values = [item for item in value if item is not None]
+                clause = f'{_quote(column)} IN ({", ".join("?" * len(values))})'
+                params.extend(values)
+                if len(values) < len(value):
+                    clause = f'({clause} OR {_quote(column)} IS NULL)'
+                where.append(clause)
+            elif value is None:
+                where.append(f'{_quote(column)} IS NULL')
+            else:
+                where.append(f'{_quote(column)} = ?')
+                params.append(value)
+        if start is not None or end is not None:
+            if table not in DATE_COLUMNS:
+                raise ValueError(f"Table {table!r} has no date column for time-range queries")
+            date_column = _quote(DATE_COLUMNS[table])
+            if start is not None:
+                where.append(f'{date_column} >= ?')
+                params.append(_to_order_time(start))
+            if end is not None:
+                where.append(f'{date_column} < ?')
+                params.append(_to_order_time(end))
+
+        sql = f'SELECT {", ".join(select)} FROM {_quote(table)}'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        if group_by:
+            sql += ' GROUP BY ' + ', '.join(_quote(column) for column in group_by)
+        if order_by is not None:
+            if order_by not in aggregates:
+                self._check_column(table, order_by)
+            sql += f' ORDER BY {_quote(order_by)} {"ASC" if ascending else "DESC"}'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+
+        return self._execute(sql, params)
+
+    def top(self, table, by, metric=None, func='count', n=10, **kwargs):
+        """Top-N values of a dimension, ranked by an aggregate of metric."""
+        name = 'Count' if func == 'count' else f'{func.capitalize()} {metric}'
+        aggregates = {name: (func, metric or '*')}
+        return self.query(table, group_by=by, aggregates=aggregates, order_by=name, limit=n, **kwargs)
+
+    def _execute(self, sql, params):
+        key = (sql, tuple(params))
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key].copy()
+        result = pd.read_sql_query(sql, self.conn, params=params)
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result.copy()
+
+    def categories(self):
+        if 'products' not in self._columns:
+            return set()
+        return {row[0] for row in self.conn.execute('SELECT DISTINCT category FROM products')}
+
+    def close(self):
+        self.conn.close()
+
+
+def build_query_database(db_path=DB_FILENAME, products_pattern='../dist/*.xlsx'):
+    """Build the query database from the cleaned datasets.
+
+    The tables are written to a temporary file that only replaces db_path once the
+    build succeeds, so a failed load never leaves a half-built database behind.
+    """
+    tmp_path = db_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    builder = YoshopsQuery(tmp_path)
+    try:
+        df, df2 = load_datasets()
+        clean_datasets(df, df2)
+        builder.build(reviews=prepare_reviews(df), orders=prepare_orders(df2),
+                      products=load_scraped_products(products_pattern))
+    except Exception:
+        builder.close()
+        os.remove(tmp_path)
+        raise
+    builder.close()
+    os.replace(tmp_path, db_path)
+
+
+def open_query_database(db_path=DB_FILENAME, products_pattern='../dist/*.xlsx', rebuild=False):
+    """Open the cached query database, building it from the cleaned datasets if needed.
+
+    The database is rebuilt when a dataset, a scraped sheet, or the cleaning code is
+    newer than it, when a scraped sheet was added or removed, or when rebuild=True.
+    """
+    product_files = glob.glob(products_pattern)
+    sources = ['review_dataset.csv', 'orders_2016-2020_Dataset.csv', EDA_yoshops.__file__, __file__] + product_files
+    stale = rebuild or not os.path.exists(db_path) or any(
+        os.path.getmtime(path) > os.path.getmtime(db_path) for path in sources if os.path.exists(path))
+
+    if not stale:
+        querier = YoshopsQuery(db_path)
+        scraped = {os.path.splitext(os.path.basename(path))[0] for path in product_files}
+        if REQUIRED_TABLES.issubset(querier.tables()) and querier.categories() == scraped:
+            return querier
+        querier.close()
+
+    build_query_database(db_path, products_pattern)
+    return YoshopsQuery(db_path)
+
+
+if __name__ == "__main__":
+    querier = open_query_database()
+    print(querier.top('orders', 'Shipping State', 'Total', func='sum'))
+    print(querier.top('reviews', 'category'))
+    querier.close()